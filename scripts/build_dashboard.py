@@ -7,48 +7,232 @@ primary signals — clones and total views are excluded because
 GitHub traffic data is heavily inflated by automated bot scrapers.
 """
 
-import json
+import gzip
+import html
+import os
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import TypedDict
+
+try:
+    import msgspec
+except ImportError:  # stdlib fallback
+    msgspec = None
+
+from storage import DATA_DIR, is_repo_file, json_dumps_compact, json_loads, read_bytes
 
-DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 DOCS_DIR = Path(__file__).resolve().parent.parent / "docs"
+SUMMARY_CACHE = DATA_DIR / "_summary_cache.json"
+SUMMARY_CACHE_VERSION = 2
+
+# One line color per charted repo; the chart shows the top len(CHART_COLORS)
+CHART_COLORS = (
+    "#3b82f6", "#ef4444", "#10b981", "#f59e0b", "#8b5cf6",
+    "#ec4899", "#06b6d4", "#84cc16", "#f97316", "#6366f1",
+)
+
+
+class DailySeries(TypedDict):
+    """Parallel date-sorted lists; total counts are not displayed, so not decoded."""
+    dates: list[str]
+    uniques: list[int]
+
+
+class Totals(TypedDict):
+    views_count: int
+    views_uniques: int
+    clones_count: int
+    clones_uniques: int
+
+
+class Referrer(TypedDict):
+    referrer: str
+    count: int
+    uniques: int
+
+
+class RepoFile(TypedDict, total=False):
+    """The parts of a data/{repo}.json file the dashboard reads.
 
+    Clones and paths are archived but never displayed, so they are left
+    out of the schema and the msgspec decoder skips over them.
+    """
+    repo: str
+    description: str
+    stars: int
+    forks: int
+    last_updated: str
+    totals: Totals
+    views: DailySeries
+    referrers: list[Referrer]
 
-def load_all_repos() -> list[dict]:
-    """Load all repo data files."""
-    repos = []
-    for f in sorted(DATA_DIR.glob("*.json")):
-        if f.name == "latest_run.json":
-            continue
-        with open(f) as fh:
-            data = json.load(fh)
-            repos.append(data)
-    return repos
 
+_REPO_DECODER = msgspec.json.Decoder(RepoFile) if msgspec is not None else None
 
-def compute_totals(repo: dict) -> dict:
-    """Compute totals from daily data."""
-    unique_views = sum(d["uniques"] for d in repo.get("views", {}).values())
-    days_tracked = len(repo.get("views", {}))
+
+def load_repo_file(raw: bytes) -> RepoFile:
+    """Decode a repo data file, using the typed msgspec decoder when available."""
+    if _REPO_DECODER is not None:
+        return _REPO_DECODER.decode(raw)
+    return json_loads(raw)
+
+
+def repo_files() -> list[os.DirEntry]:
+    """List per-repo data files, skipping run metadata and sidecar caches.
+
+    Uses os.scandir so each entry's stat() result is fetched once and cached.
+    """
+    with os.scandir(DATA_DIR) as it:
+        entries = [e for e in it if is_repo_file(e.name)]
+    return sorted(entries, key=lambda e: e.name)
+
+
+def compute_totals(repo: RepoFile) -> dict:
+    """Summarize a repo, using the running totals kept by the collector."""
+    unique_views = repo["totals"]["views_uniques"]
+    days_tracked = len(repo["views"]["dates"])
+    name = repo.get("repo", "unknown")
+    description = repo.get("description", "")
     return {
-        "name": repo.get("repo", "unknown"),
-        "description": repo.get("description", ""),
+        "name": name,
+        "description": description,
+        # Escaped once here (and cached) rather than on every render
+        "name_html": html.escape(name),
+        "description_html": html.escape(description[:80]),
         "stars": repo.get("stars", 0),
         "forks": repo.get("forks", 0),
         "unique_views": unique_views,
         "days_tracked": days_tracked,
         "last_updated": repo.get("last_updated", ""),
         "referrers": repo.get("referrers", []),
-        "paths": repo.get("paths", []),
-        "views": repo.get("views", {}),
     }
 
 
-def generate_html(repos: list[dict]) -> str:
+def load_summary_cache() -> dict:
+    """Load cached per-file totals, or an empty cache if missing or stale."""
+    if not SUMMARY_CACHE.exists():
+        return {}
+    try:
+        cache = json_loads(SUMMARY_CACHE.read_bytes())
+    except ValueError:
+        return {}
+    if cache.get("version") != SUMMARY_CACHE_VERSION:
+        return {}
+    return cache.get("files", {})
+
+
+def load_summaries() -> list[dict]:
+    """Compute totals for every repo file.
+
+    Totals are cached in data/_summary_cache.json keyed by file mtime, so
+    files the collector hasn't rewritten since the last build are never
+    parsed. Each summary records its source file so the chart can load
+    daily views for just the repos it plots.
+    """
+    cache = load_summary_cache()
+    files = {}
+    summaries = []
+    for f in repo_files():
+        mtime = f.stat().st_mtime_ns
+        entry = cache.get(f.name)
+        if entry is None or entry["mtime"] != mtime:
+            entry = {"mtime": mtime, "totals": compute_totals(load_repo_file(read_bytes(Path(f.path))))}
+        files[f.name] = entry
+        summaries.append({**entry["totals"], "file": f.name})
+
+    if files != cache:
+        SUMMARY_CACHE.write_bytes(json_dumps_compact({"version": SUMMARY_CACHE_VERSION, "files": files}))
+    return summaries
+
+
+def load_views(summary: dict) -> DailySeries:
+    """Load the daily views for a single summarized repo."""
+    return load_repo_file(read_bytes(DATA_DIR / summary["file"]))["views"]
+
+
+# Static page chrome, kept out of generate_html's f-string so it is built
+# once at import and its CSS/JS braces don't need escaping.
+PAGE_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>GitHub Traffic Dashboard — vishalsachdev</title>
+  <script src="https://cdn.jsdelivr.net/npm/chart.js@4"></script>
+  <style>
+    :root {
+      --bg: #0d1117; --surface: #161b22; --border: #30363d;
+      --text: #e6edf3; --text-dim: #8b949e; --accent: #58a6ff;
+      --green: #3fb950; --red: #f85149; --yellow: #d29922;
+    }
+    * { margin: 0; padding: 0; box-sizing: border-box; }
+    body {
+      font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
+      background: var(--bg); color: var(--text); line-height: 1.5;
+      padding: 2rem; max-width: 1200px; margin: 0 auto;
+    }
+    h1 { font-size: 1.5rem; margin-bottom: 0.25rem; }
+    .subtitle { color: var(--text-dim); margin-bottom: 1.5rem; font-size: 0.9rem; }
+    .methodology {
+      background: var(--surface); border: 1px solid var(--border); border-left: 3px solid var(--yellow);
+      border-radius: 6px; padding: 1rem 1.25rem; margin-bottom: 2rem; font-size: 0.85rem;
+      color: var(--text-dim); line-height: 1.6;
+    }
+    .methodology strong { color: var(--text); }
+    .cards {
+      display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
+      gap: 1rem; margin-bottom: 2rem;
+    }
+    .card {
+      background: var(--surface); border: 1px solid var(--border);
+      border-radius: 8px; padding: 1.25rem;
+    }
+    .card.primary { border-color: var(--accent); }
+    .card .label { color: var(--text-dim); font-size: 0.75rem; text-transform: uppercase; letter-spacing: 0.05em; }
+    .card .value { font-size: 1.75rem; font-weight: 600; margin-top: 0.25rem; }
+    .card.primary .value { color: var(--accent); }
+    .chart-container {
+      background: var(--surface); border: 1px solid var(--border);
+      border-radius: 8px; padding: 1.5rem; margin-bottom: 2rem;
+    }
+    .chart-container h2 { font-size: 1rem; margin-bottom: 1rem; }
+    .section { margin-bottom: 2rem; }
+    .section h2 { font-size: 1rem; margin-bottom: 0.75rem; }
+    table { width: 100%; border-collapse: collapse; background: var(--surface); border-radius: 8px; overflow: hidden; }
+    th, td { padding: 0.6rem 1rem; text-align: left; border-bottom: 1px solid var(--border); font-size: 0.875rem; }
+    th { color: var(--text-dim); font-weight: 500; font-size: 0.75rem; text-transform: uppercase; letter-spacing: 0.05em; }
+    td a { color: var(--accent); text-decoration: none; }
+    td a:hover { text-decoration: underline; }
+    .num { text-align: right; font-variant-numeric: tabular-nums; }
+    .repo-row:hover { background: rgba(88, 166, 255, 0.05); }
+    .repo-desc { color: var(--text-dim); font-size: 0.75rem; margin-top: 0.15rem; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; max-width: 350px; }
+    .star-badge { color: var(--yellow); font-weight: 600; }
+    .star-zero { color: var(--text-dim); }
+    .three-col { display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 1.5rem; }
+    .two-col { display: grid; grid-template-columns: 1fr 1fr; gap: 1.5rem; }
+    @media (max-width: 900px) { .three-col { grid-template-columns: 1fr; } }
+    @media (max-width: 768px) { .two-col { grid-template-columns: 1fr; } }
+    footer { color: var(--text-dim); font-size: 0.8rem; margin-top: 3rem; text-align: center; }
+  </style>
+</head>"""
+
+CHART_OPTIONS = """{
+        responsive: true,
+        interaction: { mode: 'index', intersect: false },
+        plugins: {
+          legend: { position: 'bottom', labels: { color: '#8b949e', boxWidth: 12, padding: 16 } }
+        },
+        scales: {
+          x: { ticks: { color: '#8b949e', maxTicksLimit: 12 }, grid: { color: '#21262d' } },
+          y: { ticks: { color: '#8b949e' }, grid: { color: '#21262d' }, beginAtZero: true }
+        }
+      }"""
+
+
+def generate_html(summaries: list[dict]) -> str:
     """Generate the dashboard HTML."""
-    summaries = [compute_totals(r) for r in repos]
-    summaries.sort(key=lambda x: x["unique_views"], reverse=True)
+    summaries = sorted(summaries, key=lambda x: x["unique_views"], reverse=True)
 
     # Aggregate stats
     grand_uniques = sum(s["unique_views"] for s in summaries)
@@ -60,138 +244,82 @@ def generate_html(repos: list[dict]) -> str:
     run_file = DATA_DIR / "latest_run.json"
     last_run = ""
     if run_file.exists():
-        with open(run_file) as f:
-            meta = json.load(f)
-            last_run = meta.get("collected_at", "")[:10]
+        meta = json_loads(run_file.read_bytes())
+        last_run = meta.get("collected_at", "")[:10]
 
     # Build repo rows — sorted by unique views
-    repo_rows = ""
+    rows = []
     for s in summaries:
         star_badge = f'<span class="star-badge">{s["stars"]}</span>' if s["stars"] > 0 else '<span class="star-zero">0</span>'
-        repo_rows += f"""
+        rows.append(f"""
         <tr class="repo-row">
           <td>
-            <a href="https://github.com/vishalsachdev/{s['name']}" target="_blank">{s['name']}</a>
-            {f'<div class="repo-desc">{s["description"][:80]}</div>' if s['description'] else ''}
+            <a href="https://github.com/vishalsachdev/{s['name_html']}" target="_blank">{s['name_html']}</a>
+            {f'<div class="repo-desc">{s["description_html"]}</div>' if s['description'] else ''}
           </td>
           <td class="num">{s['unique_views']:,}</td>
           <td class="num">{star_badge}</td>
           <td class="num">{s['forks']}</td>
           <td class="num">{s['days_tracked']}</td>
-        </tr>"""
+        </tr>""")
+    repo_rows = "".join(rows)
 
     # Prepare chart data — unique visitors for top 10 repos
-    chart_repos = summaries[:10]
+    chart_repos = summaries[:len(CHART_COLORS)]
+    chart_views = [load_views(s) for s in chart_repos]
     all_dates = set()
-    for s in chart_repos:
-        all_dates.update(s["views"].keys())
+    for views in chart_views:
+        all_dates.update(views["dates"])
     all_dates = sorted(all_dates)
+    date_index = {d: i for i, d in enumerate(all_dates)}
 
-    chart_labels = json.dumps(all_dates)
+    chart_labels = json_dumps_compact(all_dates).decode()
     datasets = []
-    colors = [
-        "#3b82f6", "#ef4444", "#10b981", "#f59e0b", "#8b5cf6",
-        "#ec4899", "#06b6d4", "#84cc16", "#f97316", "#6366f1",
-    ]
-    for i, s in enumerate(chart_repos):
-        values = [s["views"].get(d, {}).get("uniques", 0) for d in all_dates]
+    for s, views, color in zip(chart_repos, chart_views, CHART_COLORS):
+        if len(views["dates"]) == len(all_dates):
+            # Every repo's dates are a subset of the axis, so equal length
+            # means the series already lines up with it
+            values = list(views["uniques"])
+        else:
+            # Scatter the repo's days into a zero-filled row for the shared axis
+            values = [0] * len(all_dates)
+            for d, u in zip(views["dates"], views["uniques"]):
+                values[date_index[d]] = u
         datasets.append({
             "label": s["name"],
             "data": values,
-            "borderColor": colors[i % len(colors)],
+            "borderColor": color,
             "fill": False,
             "tension": 0.3,
         })
-    chart_datasets = json.dumps(datasets)
+    chart_datasets = json_dumps_compact(datasets).decode()
 
     # Top referrers across all repos
-    all_referrers: dict[str, int] = {}
+    all_referrers: Counter[str] = Counter()
     for s in summaries:
         for ref in s["referrers"]:
-            name = ref.get("referrer", "unknown")
-            all_referrers[name] = all_referrers.get(name, 0) + ref.get("count", 0)
-    top_referrers = sorted(all_referrers.items(), key=lambda x: x[1], reverse=True)[:10]
-    referrer_rows = ""
-    for name, count in top_referrers:
-        referrer_rows += f"<tr><td>{name}</td><td class='num'>{count:,}</td></tr>\n"
+            all_referrers[ref.get("referrer", "unknown")] += ref.get("count", 0)
+    top_referrers = all_referrers.most_common(10)
+    referrer_rows = "".join(
+        f"<tr><td>{html.escape(name)}</td><td class='num'>{count:,}</td></tr>\n" for name, count in top_referrers
+    )
 
     # Top repos by stars (separate ranking)
     by_stars = sorted(summaries, key=lambda x: x["stars"], reverse=True)[:10]
-    star_rows = ""
+    rows = []
     for s in by_stars:
         if s["stars"] == 0:
             break
-        star_rows += f"""<tr>
-          <td><a href="https://github.com/vishalsachdev/{s['name']}" target="_blank">{s['name']}</a></td>
+        rows.append(f"""<tr>
+          <td><a href="https://github.com/vishalsachdev/{s['name_html']}" target="_blank">{s['name_html']}</a></td>
           <td class="num">{s['stars']}</td>
           <td class="num">{s['forks']}</td>
-        </tr>"""
+        </tr>""")
+    star_rows = "".join(rows)
 
     now = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
-    return f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>GitHub Traffic Dashboard — vishalsachdev</title>
-  <script src="https://cdn.jsdelivr.net/npm/chart.js@4"></script>
-  <style>
-    :root {{
-      --bg: #0d1117; --surface: #161b22; --border: #30363d;
-      --text: #e6edf3; --text-dim: #8b949e; --accent: #58a6ff;
-      --green: #3fb950; --red: #f85149; --yellow: #d29922;
-    }}
-    * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-    body {{
-      font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
-      background: var(--bg); color: var(--text); line-height: 1.5;
-      padding: 2rem; max-width: 1200px; margin: 0 auto;
-    }}
-    h1 {{ font-size: 1.5rem; margin-bottom: 0.25rem; }}
-    .subtitle {{ color: var(--text-dim); margin-bottom: 1.5rem; font-size: 0.9rem; }}
-    .methodology {{
-      background: var(--surface); border: 1px solid var(--border); border-left: 3px solid var(--yellow);
-      border-radius: 6px; padding: 1rem 1.25rem; margin-bottom: 2rem; font-size: 0.85rem;
-      color: var(--text-dim); line-height: 1.6;
-    }}
-    .methodology strong {{ color: var(--text); }}
-    .cards {{
-      display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-      gap: 1rem; margin-bottom: 2rem;
-    }}
-    .card {{
-      background: var(--surface); border: 1px solid var(--border);
-      border-radius: 8px; padding: 1.25rem;
-    }}
-    .card.primary {{ border-color: var(--accent); }}
-    .card .label {{ color: var(--text-dim); font-size: 0.75rem; text-transform: uppercase; letter-spacing: 0.05em; }}
-    .card .value {{ font-size: 1.75rem; font-weight: 600; margin-top: 0.25rem; }}
-    .card.primary .value {{ color: var(--accent); }}
-    .chart-container {{
-      background: var(--surface); border: 1px solid var(--border);
-      border-radius: 8px; padding: 1.5rem; margin-bottom: 2rem;
-    }}
-    .chart-container h2 {{ font-size: 1rem; margin-bottom: 1rem; }}
-    .section {{ margin-bottom: 2rem; }}
-    .section h2 {{ font-size: 1rem; margin-bottom: 0.75rem; }}
-    table {{ width: 100%; border-collapse: collapse; background: var(--surface); border-radius: 8px; overflow: hidden; }}
-    th, td {{ padding: 0.6rem 1rem; text-align: left; border-bottom: 1px solid var(--border); font-size: 0.875rem; }}
-    th {{ color: var(--text-dim); font-weight: 500; font-size: 0.75rem; text-transform: uppercase; letter-spacing: 0.05em; }}
-    td a {{ color: var(--accent); text-decoration: none; }}
-    td a:hover {{ text-decoration: underline; }}
-    .num {{ text-align: right; font-variant-numeric: tabular-nums; }}
-    .repo-row:hover {{ background: rgba(88, 166, 255, 0.05); }}
-    .repo-desc {{ color: var(--text-dim); font-size: 0.75rem; margin-top: 0.15rem; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; max-width: 350px; }}
-    .star-badge {{ color: var(--yellow); font-weight: 600; }}
-    .star-zero {{ color: var(--text-dim); }}
-    .three-col {{ display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 1.5rem; }}
-    .two-col {{ display: grid; grid-template-columns: 1fr 1fr; gap: 1.5rem; }}
-    @media (max-width: 900px) {{ .three-col {{ grid-template-columns: 1fr; }} }}
-    @media (max-width: 768px) {{ .two-col {{ grid-template-columns: 1fr; }} }}
-    footer {{ color: var(--text-dim); font-size: 0.8rem; margin-top: 3rem; text-align: center; }}
-  </style>
-</head>
+    return PAGE_HEAD + f"""
 <body>
   <h1>GitHub Traffic Dashboard</h1>
   <p class="subtitle">vishalsachdev &middot; {len(summaries)} repos tracked &middot; Last collection: {last_run or now}</p>
@@ -273,17 +401,7 @@ def generate_html(repos: list[dict]) -> str:
         labels: {chart_labels},
         datasets: {chart_datasets}
       }},
-      options: {{
-        responsive: true,
-        interaction: {{ mode: 'index', intersect: false }},
-        plugins: {{
-          legend: {{ position: 'bottom', labels: {{ color: '#8b949e', boxWidth: 12, padding: 16 }} }}
-        }},
-        scales: {{
-          x: {{ ticks: {{ color: '#8b949e', maxTicksLimit: 12 }}, grid: {{ color: '#21262d' }} }},
-          y: {{ ticks: {{ color: '#8b949e' }}, grid: {{ color: '#21262d' }}, beginAtZero: true }}
-        }}
-      }}
+      options: {CHART_OPTIONS}
     }});
   </script>
 </body>
@@ -291,13 +409,16 @@ def generate_html(repos: list[dict]) -> str:
 
 
 def main():
-    repos = load_all_repos()
-    html = generate_html(repos)
+    summaries = load_summaries()
+    page = generate_html(summaries)
 
     DOCS_DIR.mkdir(parents=True, exist_ok=True)
     out = DOCS_DIR / "index.html"
-    out.write_text(html)
-    print(f"Dashboard written to {out} ({len(repos)} repos)")
+    raw = page.encode()
+    out.write_bytes(raw)
+    # GitHub Pages gzips responses itself, so only report the wire size
+    wire = len(gzip.compress(raw, compresslevel=9))
+    print(f"Dashboard written to {out} ({len(summaries)} repos, {len(raw) / 1024:.1f} KB, {wire / 1024:.1f} KB gzipped)")
 
 
 if __name__ == "__main__":
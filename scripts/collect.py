@@ -8,44 +8,96 @@ Usage:
     python scripts/collect.py                    # uses GITHUB_OWNER env or defaults
     python scripts/collect.py --owner myuser
     python scripts/collect.py --dry-run          # preview without writing
+    python scripts/collect.py --migrate          # rewrite data files, no API calls
 """
 
 import argparse
-import json
+import http.client
 import os
 import sys
-import urllib.request
-import urllib.error
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import urlsplit
 
-DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+from storage import DATA_DIR, existing_variant, is_repo_file, json_loads, read_bytes, write_json
+
+ETAGS_FILE = DATA_DIR / "_etags.json"
+METADATA_FILE = DATA_DIR / "_metadata.json"
+METADATA_KEYS = ("stars", "forks", "description", "pushed_at")
 GITHUB_API = "https://api.github.com"
+# Traffic calls are network-bound; a small pool keeps us clear of
+# GitHub's secondary (concurrency) rate limits.
+MAX_WORKERS = 8
 
+# One keep-alive connection per worker thread, so TCP/TLS setup is paid
+# once per thread instead of once per request.
+_local = threading.local()
 
-def gh_request(path: str, token: str) -> dict | list | None:
-    """Make an authenticated GitHub API request."""
-    url = f"{GITHUB_API}{path}"
-    req = urllib.request.Request(url)
-    req.add_header("Authorization", f"token {token}")
-    req.add_header("Accept", "application/vnd.github.v3+json")
-    req.add_header("User-Agent", "github-stats-tracker")
-    try:
-        with urllib.request.urlopen(req) as resp:
-            return json.loads(resp.read().decode())
-    except urllib.error.HTTPError as e:
-        if e.code == 403 and "rate limit" in e.read().decode().lower():
-            print(f"  Rate limited on {path}", file=sys.stderr)
-        elif e.code == 404:
-            # Traffic endpoints return 404 for repos with zero traffic
-            return None
-        else:
-            print(f"  HTTP {e.code} on {path}", file=sys.stderr)
+# Returned by gh_request when a conditional request gets a 304
+NOT_MODIFIED = object()
+
+
+def _connection() -> http.client.HTTPSConnection:
+    """Return this thread's persistent connection to the GitHub API."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = http.client.HTTPSConnection(urlsplit(GITHUB_API).netloc, timeout=30)
+    return conn
+
+
+def gh_request(path: str, token: str, etags: dict | None = None) -> dict | list | None:
+    """Make an authenticated GitHub API request.
+
+    If an etags map is given, the request is conditional on the ETag stored
+    for this path and returns NOT_MODIFIED on a 304. A fresh ETag from a 200
+    is recorded back into the map.
+    """
+    headers = {
+        "Authorization": f"token {token}",
+        "Accept": "application/vnd.github.v3+json",
+        "User-Agent": "github-stats-tracker",
+    }
+    if etags and path in etags:
+        headers["If-None-Match"] = etags[path]
+    for attempt in range(2):
+        conn = _connection()
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+            break
+        except (http.client.HTTPException, OSError):
+            # The server may have closed an idle keep-alive connection; retry once
+            conn.close()
+            _local.conn = None
+            if attempt:
+                raise
+
+    if resp.status == 200:
+        if etags is not None and resp.getheader("ETag"):
+            etags[path] = resp.getheader("ETag")
+        return json_loads(body)
+    if resp.status == 304:
+        return NOT_MODIFIED
+    if resp.status == 403 and b"rate limit" in body.lower():
+        print(f"  Rate limited on {path}", file=sys.stderr)
+    elif resp.status == 404:
+        # Traffic endpoints return 404 for repos with zero traffic
         return None
+    else:
+        print(f"  HTTP {resp.status} on {path}", file=sys.stderr)
+    return None
 
 
 def get_public_repos(owner: str, token: str) -> list[dict]:
-    """Get all public repos with metadata for a user."""
+    """Get all public repos with metadata for a user.
+
+    The listing already carries every metadata field we store, so one call
+    per 100 repos replaces a GET /repos/{owner}/{repo} per repo.
+    """
     repos = []
     page = 1
     while True:
@@ -61,6 +113,7 @@ def get_public_repos(owner: str, token: str) -> list[dict]:
                     "stars": r.get("stargazers_count", 0),
                     "forks": r.get("forks_count", 0),
                     "description": r.get("description") or "",
+                    "pushed_at": r.get("pushed_at") or "",
                 })
         if len(data) < 100:
             break
@@ -68,39 +121,108 @@ def get_public_repos(owner: str, token: str) -> list[dict]:
     return sorted(repos, key=lambda x: x["name"])
 
 
-def collect_repo_traffic(owner: str, repo: str, token: str) -> dict:
-    """Collect all traffic data for a single repo."""
-    views = gh_request(f"/repos/{owner}/{repo}/traffic/views", token)
-    clones = gh_request(f"/repos/{owner}/{repo}/traffic/clones", token)
-    referrers = gh_request(f"/repos/{owner}/{repo}/traffic/popular/referrers", token)
-    paths = gh_request(f"/repos/{owner}/{repo}/traffic/popular/paths", token)
+def collect_repo_traffic(owner: str, repo: str, token: str, etags: dict | None = None) -> dict:
+    """Collect all traffic data for a single repo.
+
+    Endpoints that answer 304 to a conditional request are listed under
+    "not_modified" and get empty payloads: their data is already on disk.
+    """
+    base = f"/repos/{owner}/{repo}/traffic"
+    responses = {
+        "views": gh_request(f"{base}/views", token, etags),
+        "clones": gh_request(f"{base}/clones", token, etags),
+        "referrers": gh_request(f"{base}/popular/referrers", token, etags),
+        "paths": gh_request(f"{base}/popular/paths", token, etags),
+    }
+    empty = {
+        "views": {"count": 0, "uniques": 0, "views": []},
+        "clones": {"count": 0, "uniques": 0, "clones": []},
+        "referrers": [],
+        "paths": [],
+    }
+    traffic = {
+        key: empty[key] if not data or data is NOT_MODIFIED else data
+        for key, data in responses.items()
+    }
+    traffic["not_modified"] = [key for key, data in responses.items() if data is NOT_MODIFIED]
+    return traffic
+
+
+def load_sidecar(path: Path) -> dict:
+    """Load a per-repo sidecar from the last run (ETags or metadata), or {}."""
+    if path.exists():
+        return json_loads(path.read_bytes())
+    return {}
 
+
+def to_series(daily: dict) -> dict:
+    """Convert a legacy {date: {count, uniques}} map to parallel sorted lists."""
+    if "dates" in daily:
+        return daily
+    dates = sorted(daily)
     return {
-        "views": views or {"count": 0, "uniques": 0, "views": []},
-        "clones": clones or {"count": 0, "uniques": 0, "clones": []},
-        "referrers": referrers or [],
-        "paths": paths or [],
+        "dates": dates,
+        "counts": [daily[d]["count"] for d in dates],
+        "uniques": [daily[d]["uniques"] for d in dates],
     }
 
 
+def compute_totals(data: dict) -> dict:
+    """Sum daily views and clones over the full history."""
+    totals = {}
+    for key in ("views", "clones"):
+        totals[f"{key}_count"] = sum(data[key]["counts"])
+        totals[f"{key}_uniques"] = sum(data[key]["uniques"])
+    return totals
+
+
 def load_existing_data(filepath: Path) -> dict:
     """Load existing repo data file, or return empty structure."""
-    if filepath.exists():
-        with open(filepath) as f:
-            return json.load(f)
-    return {"views": {}, "clones": {}, "referrers": [], "paths": []}
+    found = existing_variant(filepath)
+    if found is not None:
+        data = json_loads(read_bytes(found))
+    else:
+        data = {"views": {}, "clones": {}, "referrers": [], "paths": []}
+    # Files written before the parallel-list layout and running totals
+    for key in ("views", "clones"):
+        data[key] = to_series(data.get(key, {}))
+    if "totals" not in data:
+        data["totals"] = compute_totals(data)
+    return data
 
 
 def merge_daily_data(existing: dict, key: str, new_entries: list) -> dict:
-    """Merge new daily entries into existing data, deduplicating by date."""
-    date_map = dict(existing.get(key, {}))
+    """Merge new daily entries into existing data, deduplicating by date.
+
+    Each series is kept as parallel date-sorted lists, so a day is placed
+    with a binary search instead of rebuilding and re-sorting the whole
+    history. GitHub returns days in ascending order, so each search starts
+    just past the previous day, confining it to the overlapping tail.
+    existing["totals"] is adjusted by the difference from any day being
+    replaced, so totals stay current without re-summing.
+    """
+    series = existing[key]
+    dates, counts, uniques = series["dates"], series["counts"], series["uniques"]
+    totals = existing["totals"]
+    lo = 0
     for entry in new_entries:
         ts = entry["timestamp"][:10]  # YYYY-MM-DD
-        date_map[ts] = {
-            "count": entry["count"],
-            "uniques": entry["uniques"],
-        }
-    return dict(sorted(date_map.items()))
+        if lo and ts <= dates[lo - 1]:
+            lo = 0  # out of order; search the whole series
+        i = bisect_left(dates, ts, lo)
+        if i < len(dates) and dates[i] == ts:
+            totals[f"{key}_count"] += entry["count"] - counts[i]
+            totals[f"{key}_uniques"] += entry["uniques"] - uniques[i]
+            counts[i] = entry["count"]
+            uniques[i] = entry["uniques"]
+        else:
+            totals[f"{key}_count"] += entry["count"]
+            totals[f"{key}_uniques"] += entry["uniques"]
+            dates.insert(i, ts)
+            counts.insert(i, entry["count"])
+            uniques.insert(i, entry["uniques"])
+        lo = i + 1
+    return series
 
 
 def merge_referrers(existing: list, new: list) -> list:
@@ -119,15 +241,24 @@ def merge_paths(existing: list, new: list) -> list:
     return sorted(path_map.values(), key=lambda x: x.get("count", 0), reverse=True)
 
 
-def save_repo_data(filepath: Path, data: dict):
-    """Save repo data to JSON file."""
+def save_repo_data(filepath: Path, data: dict, compress: bool = False):
+    """Save repo data to JSON file, gzip-compressed if requested."""
     filepath.parent.mkdir(parents=True, exist_ok=True)
-    with open(filepath, "w") as f:
-        json.dump(data, f, indent=2)
-        f.write("\n")
+    write_json(filepath, data, compress)
 
 
-def collect_all(owner: str, token: str, dry_run: bool = False):
+def update_metadata(filepath: Path, repo_info: dict, compress: bool = False) -> bool:
+    """Refresh stored repo metadata, rewriting the file only if it changed."""
+    data = load_existing_data(filepath)
+    meta = {key: repo_info[key] for key in METADATA_KEYS}
+    if all(data.get(key) == value for key, value in meta.items()):
+        return False
+    data.update(meta)
+    save_repo_data(filepath, data, compress)
+    return True
+
+
+def collect_all(owner: str, token: str, dry_run: bool = False, compress: bool = False):
     """Main collection loop."""
     print(f"Collecting traffic stats for {owner}...")
     repos = get_public_repos(owner, token)
@@ -137,14 +268,42 @@ def collect_all(owner: str, token: str, dry_run: bool = False):
     summary = {"collected_at": collected_at, "repos_checked": len(repos), "repos_with_traffic": 0}
     repos_with_data = []
 
-    for i, repo_info in enumerate(repos, 1):
+    # Only send conditional requests for repos whose data is on disk, so a
+    # 304 always means "already merged into the repo file".
+    etags = load_sidecar(ETAGS_FILE)
+    repo_etags = {
+        r["name"]: etags.get(r["name"], {}) if existing_variant(DATA_DIR / f"{r['name']}.json") else {}
+        for r in repos
+    }
+
+    # Fetch traffic concurrently; merging and writing stay sequential
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        all_traffic = list(executor.map(
+            lambda r: collect_repo_traffic(owner, r["name"], token, repo_etags[r["name"]]), repos
+        ))
+
+    # Metadata last written to each repo file, so unchanged repos can be
+    # skipped without reading their file
+    metadata = load_sidecar(METADATA_FILE)
+
+    for i, (repo_info, traffic) in enumerate(zip(repos, all_traffic), 1):
         repo = repo_info["name"]
-        traffic = collect_repo_traffic(owner, repo, token)
+        meta = {key: repo_info[key] for key in METADATA_KEYS}
+        not_modified = traffic.pop("not_modified")
+
+        if len(not_modified) == len(traffic):
+            summary["repos_with_traffic"] += 1
+            repos_with_data.append(repo)
+            print(f"  [{i}/{len(repos)}] {repo} - traffic unchanged, stars: {repo_info['stars']}")
+            if not dry_run and metadata.get(repo) != meta:
+                update_metadata(DATA_DIR / f"{repo}.json", repo_info, compress)
+                metadata[repo] = meta
+            continue
 
         has_views = len(traffic["views"].get("views", [])) > 0
         has_clones = len(traffic["clones"].get("clones", [])) > 0
 
-        if has_views or has_clones:
+        if has_views or has_clones or not_modified:
             summary["repos_with_traffic"] += 1
             repos_with_data.append(repo)
             print(f"  [{i}/{len(repos)}] {repo} - views: {traffic['views'].get('count', 0)}, clones: {traffic['clones'].get('count', 0)}, stars: {repo_info['stars']}")
@@ -152,6 +311,8 @@ def collect_all(owner: str, token: str, dry_run: bool = False):
             if not dry_run:
                 filepath = DATA_DIR / f"{repo}.json"
                 existing = load_existing_data(filepath)
+                views = merge_daily_data(existing, "views", traffic["views"].get("views", []))
+                clones = merge_daily_data(existing, "clones", traffic["clones"].get("clones", []))
 
                 merged = {
                     "repo": repo,
@@ -160,40 +321,65 @@ def collect_all(owner: str, token: str, dry_run: bool = False):
                     "stars": repo_info["stars"],
                     "forks": repo_info["forks"],
                     "description": repo_info["description"],
-                    "views": merge_daily_data(existing, "views", traffic["views"].get("views", [])),
-                    "clones": merge_daily_data(existing, "clones", traffic["clones"].get("clones", [])),
+                    "pushed_at": repo_info["pushed_at"],
+                    "totals": existing["totals"],
+                    "views": views,
+                    "clones": clones,
                     "referrers": merge_referrers(existing.get("referrers", []), traffic.get("referrers", [])),
                     "paths": merge_paths(existing.get("paths", []), traffic.get("paths", [])),
                 }
-                save_repo_data(filepath, merged)
+                save_repo_data(filepath, merged, compress)
+                metadata[repo] = meta
         else:
             print(f"  [{i}/{len(repos)}] {repo} - no traffic")
 
     # Save collection summary
     if not dry_run:
         summary["repos_with_traffic_names"] = repos_with_data
-        summary_path = DATA_DIR / "latest_run.json"
-        with open(summary_path, "w") as f:
-            json.dump(summary, f, indent=2)
-            f.write("\n")
+        save_repo_data(DATA_DIR / "latest_run.json", summary)
+        save_repo_data(ETAGS_FILE, {repo: tags for repo, tags in repo_etags.items() if tags})
+        save_repo_data(METADATA_FILE, {repo: metadata[repo] for repo in repos_with_data})
 
     print(f"\nDone. {summary['repos_with_traffic']}/{len(repos)} repos had traffic.")
     if dry_run:
         print("(dry run - no files written)")
 
 
+def migrate_data_files(compress: bool = False):
+    """Rewrite every repo file in the current on-disk layout, without API calls."""
+    count = 0
+    for found in sorted(DATA_DIR.iterdir()):
+        if not is_repo_file(found.name):
+            continue
+        filepath = found.with_suffix("") if found.suffix == ".gz" else found
+        data = load_existing_data(filepath)
+        # Keep totals ahead of the history, matching collect_all's layout
+        history = {k: data.pop(k) for k in ("views", "clones", "referrers", "paths") if k in data}
+        data["totals"] = data.pop("totals")
+        data.update(history)
+        save_repo_data(filepath, data, compress)
+        count += 1
+    print(f"Migrated {count} repo files in {DATA_DIR}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Collect GitHub traffic stats")
     parser.add_argument("--owner", default=os.environ.get("GITHUB_OWNER", "vishalsachdev"))
     parser.add_argument("--dry-run", action="store_true", help="Preview without writing files")
+    parser.add_argument("--migrate", action="store_true", help="Rewrite existing data files in the current layout and exit")
+    parser.add_argument("--compress", action="store_true", help="Write repo files gzip-compressed (.json.gz)")
     args = parser.parse_args()
 
+    if args.migrate:
+        migrate_data_files(args.compress)
+        return
+
     token = os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
     if not token:
         print("Error: Set GITHUB_TOKEN or GH_TOKEN environment variable", file=sys.stderr)
         sys.exit(1)
 
-    collect_all(args.owner, token, args.dry_run)
+    collect_all(args.owner, token, args.dry_run, args.compress)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+"""Shared helpers for reading and writing files in data/.
+
+Used by both collect.py and build_dashboard.py. orjson is used when it is
+installed; the stdlib json fallback produces the same bytes.
+"""
+
+import gzip
+import json
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback
+    orjson = None
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def is_repo_file(name: str) -> bool:
+    """Whether a data/ file name is a per-repo file (not run metadata or a sidecar)."""
+    return name.endswith((".json", ".json.gz")) and name != "latest_run.json" and not name.startswith("_")
+
+
+def json_loads(raw: bytes):
+    """Parse JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_dumps(data) -> bytes:
+    """Serialize to indented, newline-terminated JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode() + b"\n"
+
+
+def json_dumps_compact(data) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def gz_path(path: Path) -> Path:
+    """The gzip-compressed variant of a data file path."""
+    return path.with_name(path.name + ".gz")
+
+
+def existing_variant(path: Path) -> Path | None:
+    """The file on disk for a data path: itself, its .gz variant, or None."""
+    for candidate in (path, gz_path(path)):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def read_bytes(path: Path) -> bytes:
+    """Read a data file's JSON bytes, decompressing .gz files."""
+    raw = path.read_bytes()
+    return gzip.decompress(raw) if path.suffix == ".gz" else raw
+
+
+def write_json(path: Path, data, compress: bool = False):
+    """Write an indented JSON data file, or its .gz variant if compress is set.
+
+    The variant not written is removed so each file exists in one form only.
+    Level 1 is plenty for the repeated keys in these files, and mtime=0
+    keeps the output reproducible so unchanged data doesn't show up in git.
+    """
+    raw = json_dumps(data)
+    if compress:
+        gz_path(path).write_bytes(gzip.compress(raw, compresslevel=1, mtime=0))
+        path.unlink(missing_ok=True)
+    else:
+        path.write_bytes(raw)
+        gz_path(path).unlink(missing_ok=True)